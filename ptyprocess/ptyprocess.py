@@ -4,9 +4,7 @@ import fcntl
 import functools
 import io
 import os
-import pickle
-import resource
-import shutil
+import select
 import signal
 import struct
 import sys
@@ -14,7 +12,7 @@ import termios
 import time
 
 # Constants
-from pty import CHILD, STDIN_FILENO
+from pty import CHILD, STDERR_FILENO, STDIN_FILENO, STDOUT_FILENO
 from typing import Any, Callable, Mapping
 
 
@@ -32,14 +30,29 @@ if _is_solaris:
 else:
     from pty import fork as pty_fork
 
+# posix_spawn() relies on the child getting the pty as its controlling
+# terminal when it opens it after setsid(), which is how Linux behaves.
+_use_posix_spawn = _platform.startswith("linux") and hasattr(os, "posix_spawn")
+
+
+# Every single byte, so that _byte() does not need to build a new object.
+_BYTES = tuple(bytes((i,)) for i in range(256))
+
 
 def _byte(i: int) -> bytes:
-    return bytes([i])
+    return _BYTES[i]
+
+
+# Set by the first call to _get_intr_eof().
+_INTR_EOF: tuple[bytes, bytes] | None = None
 
 
-@functools.cache
 def _get_intr_eof() -> tuple[bytes, bytes]:
     """Return the interrupt and EOF characters for the controlling terminal."""
+    global _INTR_EOF
+
+    if _INTR_EOF is not None:
+        return _INTR_EOF
 
     # inherit EOF and INTR definitions from controlling process.
     try:
@@ -57,8 +70,9 @@ def _get_intr_eof() -> tuple[bytes, bytes]:
         if fd is None:
             # no fd, raise ValueError to fallback on CEOF, CINTR
             raise ValueError("No stream has a fileno")
-        intr = ord(termios.tcgetattr(fd)[6][VINTR])
-        eof = ord(termios.tcgetattr(fd)[6][VEOF])
+        cc = termios.tcgetattr(fd)[6]
+        intr = ord(cc[VINTR])
+        eof = ord(cc[VEOF])
     except (ImportError, OSError, IOError, ValueError, termios.error):
         # unless the controlling process is also not a terminal,
         # such as cron(1), or when stdin and stdout are both closed.
@@ -71,14 +85,48 @@ def _get_intr_eof() -> tuple[bytes, bytes]:
             #             ^C, ^D
             (intr, eof) = (3, 4)
 
-    return _byte(intr), _byte(eof)
+    _INTR_EOF = (_byte(intr), _byte(eof))
+    return _INTR_EOF
+
+
+def _make_ctrl_table() -> bytes:
+    """Map each ASCII character to the control byte sent by sendcontrol().
+
+    Characters that have no control byte map to 0xFF.
+    """
+    table = bytearray(b"\xff" * 128)
+    for i in range(26):
+        table[ord("a") + i] = table[ord("A") + i] = i + 1
+    for chars, code in (
+        ("@`", 0),
+        ("[{", 27),
+        ("\\|", 28),
+        ("]}", 29),
+        ("^~", 30),
+        ("_", 31),
+        ("?", 127),
+    ):
+        for c in chars:
+            table[ord(c)] = code
+    return bytes(table)
+
+
+_CTRL_TABLE = _make_ctrl_table()
+
+# An exec() failure, as sent from the child to the parent: errno, strerror.
+# Longer messages are truncated by pack().
+_EXEC_ERROR = struct.Struct("i256s")
+
+# struct winsize: ws_row, ws_col, ws_xpixel, ws_ypixel
+_WINSZ = struct.Struct("HHHH")
 
 
 # setecho and setwinsize are pulled out here because on some platforms, we need
 # to do this from the child before we exec()
 
 
-def _setecho(fd: int, state: bool) -> None:
+def _setecho(fd: int, state: bool) -> list:
+    # Returns the attributes the terminal now has.
     errmsg = "setecho() may not be called on this platform (it may still be possible to enable/disable echo when spawning the child process)"
 
     try:
@@ -89,9 +137,13 @@ def _setecho(fd: int, state: bool) -> None:
         raise
 
     if state:
-        attr[3] = attr[3] | termios.ECHO
+        lflag = attr[3] | termios.ECHO
     else:
-        attr[3] = attr[3] & ~termios.ECHO
+        lflag = attr[3] & ~termios.ECHO
+    if lflag == attr[3]:
+        # Already in the requested state, no need to write it back.
+        return attr
+    attr[3] = lflag
 
     try:
         # I tried TCSADRAIN and TCSAFLUSH, but these were inconsistent and
@@ -101,6 +153,31 @@ def _setecho(fd: int, state: bool) -> None:
         if err.args[0] == errno.EINVAL:
             raise IOError(err.args[0], "%s: %s." % (err.args[1], errmsg))
         raise
+    return attr
+
+
+# Attributes of a new pty with echo turned off, set by the first call to
+# _setecho_off_new_pty().
+_NOECHO_ATTR: list | None = None
+
+
+def _setecho_off_new_pty(fd: int) -> None:
+    """Turn off echo on a pty that has only just been opened.
+
+    Every new pty starts out with the same attributes, so once they are known
+    the echo-off attributes can be written without reading them first.
+    """
+    global _NOECHO_ATTR
+
+    if _NOECHO_ATTR is not None:
+        try:
+            termios.tcsetattr(fd, termios.TCSANOW, _NOECHO_ATTR)
+            return
+        except termios.error as err:
+            if err.args[0] != errno.EINVAL:
+                raise
+
+    _NOECHO_ATTR = _setecho(fd, False)
 
 
 def _setwinsize(fd: int, rows: int, cols: int) -> None:
@@ -110,8 +187,156 @@ def _setwinsize(fd: int, rows: int, cols: int) -> None:
     # removed. For details see https://github.com/pexpect/pexpect/issues/39
     TIOCSWINSZ = getattr(termios, "TIOCSWINSZ", -2146929561)
     # Note, assume ws_xpixel and ws_ypixel are zero.
-    s = struct.pack("HHHH", rows, cols, 0, 0)
-    fcntl.ioctl(fd, TIOCSWINSZ, s)
+    fcntl.ioctl(fd, TIOCSWINSZ, _WINSZ.pack(rows, cols, 0, 0))
+
+
+def _dev_fd_lists_open_fds() -> bool:
+    # On macOS /dev/fd always lists the open descriptors. On FreeBSD and
+    # DragonFly it only does when fdescfs is mounted there; otherwise it is a
+    # static directory listing just 0, 1 and 2. Like CPython's
+    # _posixsubprocess, tell the two apart by fdescfs being a different
+    # device from /dev.
+    if _platform.startswith("darwin"):
+        return True
+    try:
+        return os.stat("/dev").st_dev != os.stat("/dev/fd").st_dev
+    except OSError:
+        return False
+
+
+def _open_fds() -> list[int] | None:
+    """Return the file descriptors open in this process, if they can be listed.
+
+    This uses ``/proc/self/fd`` on Linux, and ``/dev/fd`` on macOS and on the
+    BSDs when fdescfs is mounted there. None is returned where neither can be
+    used. The descriptor used to read the directory is included in the
+    result, but it has already been closed again when this returns.
+    """
+    try:
+        return [int(name) for name in os.listdir("/proc/self/fd")]
+    except OSError:
+        pass
+    if _dev_fd_lists_open_fds():
+        try:
+            return [int(name) for name in os.listdir("/dev/fd")]
+        except OSError:
+            pass
+    return None
+
+
+def _close_fds(keep: set[int]) -> None:
+    """Close every file descriptor above 2 that is not in ``keep``.
+
+    Where the open descriptors can be listed only those are closed. This
+    matters when RLIMIT_NOFILE is large, as it is by default in Docker, where
+    closing the whole range would mean about a million close() calls.
+    """
+    fds = _open_fds()
+    if fds is not None:
+        for fd in fds:
+            if fd <= 2 or fd in keep:
+                continue
+            try:
+                os.close(fd)
+            except OSError as err:
+                if err.errno != errno.EBADF:
+                    raise
+        return
+
+    import resource
+
+    # Impose ceiling on max_fd: AIX bugfix for users with unlimited
+    # nofiles where resource.RLIMIT_NOFILE is 2^63-1 and os.closerange()
+    # occasionally raises out of range error
+    max_fd = min(1048576, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+    spass_fds = sorted(keep)
+    for pair in zip([2] + spass_fds, spass_fds + [max_fd]):
+        os.closerange(pair[0] + 1, pair[1])
+
+
+def _spawn_via_posix_spawn(
+    command: str,
+    argv: list,
+    env: Mapping | None,
+    dimensions: tuple[int, int],
+    echo: bool,
+    pass_fds: tuple[int, ...],
+    open_fds: list[int],
+) -> tuple[int, int]:
+    """Start a child on a new pseudo terminal using posix_spawn().
+
+    Unlike pty_fork(), this does not need to copy the address space of the
+    parent, which can be slow when the parent is large. It cannot run Python
+    code in the child, so the terminal is set up from the parent, through the
+    slave end, before the child is started. ``open_fds`` lists the fds of
+    the parent, which are closed in the child unless in ``pass_fds``.
+    Returns (pid, fd) like pty_fork().
+    """
+    parent_fd, child_fd = os.openpty()
+    try:
+        try:
+            _setwinsize(child_fd, *dimensions)
+        except IOError as err:
+            if err.args[0] not in (errno.EINVAL, errno.ENOTTY):
+                raise
+
+        if not echo:
+            try:
+                _setecho_off_new_pty(child_fd)
+            except (IOError, termios.error) as err:
+                if err.args[0] not in (errno.EINVAL, errno.ENOTTY):
+                    raise
+
+        # The child opens the pty by name after setsid(), which makes it the
+        # controlling terminal of its new session.
+        file_actions = [
+            (os.POSIX_SPAWN_OPEN, STDIN_FILENO, os.ttyname(child_fd), os.O_RDWR, 0),
+            (os.POSIX_SPAWN_DUP2, STDIN_FILENO, STDOUT_FILENO),
+            (os.POSIX_SPAWN_DUP2, STDIN_FILENO, STDERR_FILENO),
+        ]
+        # Both ends of the pty, like any descriptor that is not inheritable,
+        # are closed by exec() anyway.
+        for fd in open_fds:
+            if fd <= 2 or fd in pass_fds:
+                continue
+            try:
+                if not os.get_inheritable(fd):
+                    continue
+            except OSError:
+                continue
+            file_actions.append((os.POSIX_SPAWN_CLOSE, fd))
+
+        pid = os.posix_spawn(
+            command,
+            argv,
+            os.environ if env is None else env,
+            file_actions=file_actions,
+            setsid=True,
+        )
+    except BaseException:
+        os.close(parent_fd)
+        raise
+    finally:
+        os.close(child_fd)
+
+    return pid, parent_fd
+
+
+# How long isalive() trusts its last "still running" answer, in seconds.
+_ISALIVE_CACHE_TTL = 0.01
+
+
+def _pidfd_open(pid: int) -> int | None:
+    """Return a pidfd for ``pid``, which becomes readable when it exits.
+
+    Returns None where pidfds are not supported (they need Linux 5.3).
+    """
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        return None
 
 
 class PtyProcess:
@@ -133,9 +358,12 @@ class PtyProcess:
         self.argv = argv
         self.env = env
         self.cwd = cwd
-        readf = io.open(fd, "rb", buffering=0)
-        writef = io.open(fd, "wb", buffering=0, closefd=False)
-        self.fileobj = io.BufferedRWPair(readf, writef)
+        # Data read ahead by readline() but not yet returned.
+        self._rbuf = bytearray()
+        # Data written with flush=False but not yet sent, and how much of it
+        # may build up before it is sent anyway.
+        self._wbuf = bytearray()
+        self._wbuf_limit = 65536
 
         self.terminated = False
         self.closed = False
@@ -150,6 +378,10 @@ class PtyProcess:
         # Used by terminate() to give kernel time to update process status.
         # Time in seconds.
         self.delayafterterminate = 0.1
+        # isalive() remembers that the child was running for a short while,
+        # so that e.g. kill() straight after isalive() does not ask again.
+        self._isalive_cache_val: bool | None = None
+        self._isalive_cache_time = 0.0
 
     @classmethod
     def spawn(
@@ -177,6 +409,10 @@ class PtyProcess:
         By default, all file descriptors except 0, 1 and 2 are closed. This
         behavior can be overridden with pass_fds, a list of file descriptors to
         keep open between the parent and the child.
+
+        On Linux, when neither preexec_fn nor cwd is given, the child is
+        started with posix_spawn() instead of fork(), which is much faster
+        when the parent process is large.
         """
         # Note that it is difficult for this method to fail.
         # You cannot detect if the child process cannot start.
@@ -193,7 +429,17 @@ class PtyProcess:
         argv = list(argv[:])
         command = argv[0]
 
-        command_with_path = shutil.which(command)
+        if (
+            os.path.isabs(command)
+            and os.access(command, os.X_OK)
+            and not os.path.isdir(command)
+        ):
+            # Nothing for which() to look up.
+            command_with_path = command
+        else:
+            import shutil
+
+            command_with_path = shutil.which(command)
         if command_with_path is None:
             raise FileNotFoundError(
                 "The command was not found or was not " + "executable: %s." % command
@@ -201,6 +447,25 @@ class PtyProcess:
         command = command_with_path
         argv[0] = command
 
+        global _use_posix_spawn
+        open_fds = None
+        if preexec_fn is None and cwd is None and _use_posix_spawn:
+            # posix_spawn() can only close the fds it is told about, so use
+            # fork() and _close_fds() where they cannot be listed.
+            open_fds = _open_fds()
+        if open_fds is not None:
+            # Exec errors are raised by posix_spawn() itself.
+            try:
+                pid, fd = _spawn_via_posix_spawn(
+                    command, argv, env, dimensions, echo, pass_fds, open_fds
+                )
+            except NotImplementedError:
+                # No POSIX_SPAWN_SETSID (glibc before 2.26), so use fork()
+                # from now on.
+                _use_posix_spawn = False
+            else:
+                return cls(pid, fd, argv, env, cwd)
+
         # [issue #119] To prevent the case where exec fails and the user is
         # stuck interacting with a python child process instead of whatever
         # was expected, we implement the solution from
@@ -208,6 +473,8 @@ class PtyProcess:
         # parent process
 
         # [issue #119] 1. Before forking, open a pipe in the parent process.
+        # Like all fds Python creates, both ends are close-on-exec (PEP 446);
+        # where the platform has pipe2(), the flag is set atomically.
         exec_err_pipe_read, exec_err_pipe_write = os.pipe()
 
         pid, fd = pty_fork()
@@ -227,26 +494,19 @@ class PtyProcess:
             # disable echo if spawn argument echo was unset
             if not echo:
                 try:
-                    _setecho(STDIN_FILENO, False)
+                    _setecho_off_new_pty(STDIN_FILENO)
                 except (IOError, termios.error) as err:
                     if err.args[0] not in (errno.EINVAL, errno.ENOTTY):
                         raise
 
-            # [issue #119] 3. The child closes the reading end and sets the
-            # close-on-exec flag for the writing end.
+            # [issue #119] 3. The child closes the reading end. The writing
+            # end is already close-on-exec.
             os.close(exec_err_pipe_read)
-            fcntl.fcntl(exec_err_pipe_write, fcntl.F_SETFD, fcntl.FD_CLOEXEC)
 
             # Do not allow child to inherit open file descriptors from parent,
             # with the exception of the exec_err_pipe_write of the pipe
             # and pass_fds.
-            # Impose ceiling on max_fd: AIX bugfix for users with unlimited
-            # nofiles where resource.RLIMIT_NOFILE is 2^63-1 and os.closerange()
-            # occasionally raises out of range error
-            max_fd = min(1048576, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
-            spass_fds = sorted(set(pass_fds) | {exec_err_pipe_write})
-            for pair in zip([2] + spass_fds, spass_fds + [max_fd]):
-                os.closerange(pair[0] + 1, pair[1])
+            _close_fds(set(pass_fds) | {exec_err_pipe_write})
 
             if cwd is not None:
                 os.chdir(cwd)
@@ -255,8 +515,10 @@ class PtyProcess:
                 try:
                     preexec_fn()
                 except Exception as err:
-                    with os.fdopen(exec_err_pipe_write, "wb") as f:
-                        pickle.dump(err, f)
+                    # This can be any exception, so it has to be pickled.
+                    import pickle
+
+                    os.write(exec_err_pipe_write, b"P" + pickle.dumps(err))
                     os._exit(1)
 
             try:
@@ -267,8 +529,11 @@ class PtyProcess:
             except OSError as err:
                 # [issue #119] 5. If exec fails, the child writes the error
                 # code back to the parent using the pipe, then exits.
-                with os.fdopen(exec_err_pipe_write, "wb") as f:
-                    pickle.dump(err, f)
+                strerror = (err.strerror or "").encode("utf-8", "replace")
+                os.write(
+                    exec_err_pipe_write,
+                    b"E" + _EXEC_ERROR.pack(err.errno or 0, strerror),
+                )
                 os._exit(os.EX_OSERR)
 
         # Parent
@@ -278,19 +543,32 @@ class PtyProcess:
         # of the pipe.
         os.close(exec_err_pipe_write)
 
-        # [issue #119] 6. The parent raises EOFError if the
-        # child successfully performed exec, since close-on-exec made
+        # [issue #119] 6. The parent reads nothing if the child
+        # successfully performed exec, since close-on-exec made
         # successful exec close the writing end of the pipe. Or, if exec
         # failed, the parent reads the error code and can proceed
         # accordingly. Either way, the parent blocks until the child calls
         # exec.
+        chunks = []
         try:
-            with os.fdopen(exec_err_pipe_read, "rb") as f:
-                err = pickle.load(f)
-            raise err
-        except EOFError:
-            # The parent exited without writing anything, so no bad news.
-            pass
+            while True:
+                chunk = os.read(exec_err_pipe_read, 4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(exec_err_pipe_read)
+        if chunks:
+            data = b"".join(chunks)
+            if data[:1] == b"E":
+                errnum, strerror = _EXEC_ERROR.unpack(data[1:])
+                raise OSError(
+                    errnum, strerror.rstrip(b"\0").decode("utf-8", "replace")
+                )
+
+            import pickle
+
+            raise pickle.loads(data[1:])
 
         try:
             inst.setwinsize(*dimensions)
@@ -342,22 +620,37 @@ class PtyProcess:
         the child is terminated (SIGKILL is sent if the child ignores SIGHUP
         and SIGINT)."""
         if not self.closed:
-            self.flush()
-            self.fileobj.close()  # Closes the file descriptor
+            try:
+                self.flush()
+            except OSError as err:
+                # The fd was closed by someone else, or the child has gone:
+                # the held back data can't be sent, but still close.
+                if err.errno not in (errno.EBADF, errno.EIO):
+                    raise
+                del self._wbuf[:]
+            try:
+                os.close(self.fd)
+            except OSError as err:
+                # Already closed by someone else.
+                if err.errno != errno.EBADF:
+                    raise
+            # The fd is gone now, even if terminating the child fails below.
+            self.fd = -1
+            self.closed = True
             # Give kernel time to update process status.
             time.sleep(self.delayafterclose)
             if self.isalive():
                 if not self.terminate(force):
                     raise PtyProcessError("Could not terminate the child.")
-            self.fd = -1
-            self.closed = True
             # self.pid = None
 
     def flush(self) -> None:
-        """This does nothing. It is here to support the interface for a
-        File-like object."""
+        """Write out any data held back by ``write(..., flush=False)``."""
 
-        pass
+        buf = self._wbuf
+        while buf:
+            # os.write() may not write everything in one go.
+            del buf[: os.write(self.fd, buf)]
 
     def isatty(self) -> bool:
         """This returns True if the file descriptor is open and connected to a
@@ -387,6 +680,9 @@ class PtyProcess:
         If ``timeout=None`` then this method to block until ECHO flag is False.
         """
 
+        # Poll quickly at first, backing off to every 0.1 seconds, so that a
+        # prompt which turns echo off straight away is noticed straight away.
+        delay = 0.001
         if timeout is not None:
             end_time = time.time() + timeout
             while True:
@@ -395,12 +691,14 @@ class PtyProcess:
                 if timeout < 0:
                     return False
                 timeout = end_time - time.time()
-                time.sleep(0.1)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
         else:
             while True:
                 if not self.getecho():
                     return True
-                time.sleep(0.1)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.1)
 
     def getecho(self) -> bool:
         """Returns True if terminal echo is on, or False if echo is off.
@@ -470,21 +768,40 @@ class PtyProcess:
         or older Solaris systems. It handles the errno=EIO pattern used on
         Linux, and the empty-string return used on BSD platforms and (seemingly)
         on recent Solaris.
+
+        Other Python threads keep running while this waits for data, as
+        ``os.read`` releases the GIL for the duration of the system call.
         """
-        try:
-            s = self.fileobj.read1(size)
-        except (OSError, IOError) as err:
-            if err.args[0] == errno.EIO:
-                # Linux-style EOF
-                self.flag_eof = True
-                raise EOFError("End Of File (EOF). Exception style platform.")
-            raise
-        if s == b"":
-            # BSD-style EOF (also appears to work on recent Solaris (OpenIndiana))
-            self.flag_eof = True
-            raise EOFError("End Of File (EOF). Empty string style platform.")
+        if self._rbuf:
+            s = bytes(self._rbuf[:size])
+            del self._rbuf[:size]
+            return s
 
-        return s
+        return self._readb(size)
+
+    def read_nonblocking(
+        self, size: int = 1024, timeout: int | float | None = None
+    ) -> str | bytes:
+        """Read at most ``size`` bytes, waiting at most ``timeout`` seconds.
+
+        This is :meth:`read`, except that it raises :exc:`TimeoutError` if
+        nothing arrives in time. If ``timeout=None`` then it waits as long as
+        it takes, and ``timeout=0`` only returns data that is already there.
+        """
+        if not self._rbuf:
+            # Prefer poll(), as select() cannot handle fds >= 1024.
+            if hasattr(select, "poll"):
+                poller = select.poll()
+                poller.register(self.fd, select.POLLIN)
+                # poll() would wait forever on a negative timeout.
+                ready = poller.poll(
+                    None if timeout is None else max(timeout, 0) * 1000
+                )
+            else:
+                ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                raise TimeoutError("Timeout exceeded.")
+        return self.read(size)
 
     def readline(self) -> str | bytes:
         """Read one line from the pseudoterminal, and return it as unicode.
@@ -492,8 +809,29 @@ class PtyProcess:
         Can block if there is nothing to read. Raises :exc:`EOFError` if the
         terminal was closed.
         """
+        buf = self._rbuf
+        # Where to start looking for the newline: there is none before this.
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl >= 0:
+                s = bytes(buf[: nl + 1])
+                del buf[: nl + 1]
+                return s
+            start = len(buf)
+            try:
+                buf += self._readb(io.DEFAULT_BUFFER_SIZE)
+            except EOFError:
+                # Return a last line that has no newline before raising EOF.
+                if buf:
+                    s = bytes(buf)
+                    buf.clear()
+                    return s
+                raise
+
+    def _readb(self, size: int) -> bytes:
         try:
-            s = self.fileobj.readline()
+            s = os.read(self.fd, size)
         except (OSError, IOError) as err:
             if err.args[0] == errno.EIO:
                 # Linux-style EOF
@@ -507,19 +845,81 @@ class PtyProcess:
 
         return s
 
+    def splice_to(self, out_fd: int, max_bytes: int = 65536) -> int:
+        """Move at most ``max_bytes`` bytes from the pty to ``out_fd``.
+
+        Returns the number of bytes moved. Can block if there is nothing to
+        read. Raises :exc:`EOFError` if the terminal was closed, like
+        :meth:`read`.
+
+        On Linux, when ``out_fd`` is a pipe, this uses splice(2), so the data
+        never has to be copied into Python. Otherwise it falls back to
+        reading the data and writing it to ``out_fd``.
+        """
+        if not self._rbuf and hasattr(os, "splice"):
+            try:
+                n = os.splice(self.fd, out_fd, max_bytes, flags=os.SPLICE_F_MOVE)
+            except OSError as err:
+                if err.args[0] == errno.EIO:
+                    # Linux-style EOF
+                    self.flag_eof = True
+                    raise EOFError("End Of File (EOF). Exception style platform.")
+                # EINVAL when out_fd is not a pipe, or the kernel cannot
+                # splice from a tty.
+                if err.args[0] != errno.EINVAL:
+                    raise
+            else:
+                if n == 0:
+                    self.flag_eof = True
+                    raise EOFError("End Of File (EOF). Empty string style platform.")
+                return n
+
+        # Not self.read(), which returns str on PtyProcessUnicode.
+        if self._rbuf:
+            s = bytes(self._rbuf[:max_bytes])
+            del self._rbuf[:max_bytes]
+        else:
+            s = self._readb(max_bytes)
+        data = memoryview(s)
+        while data:
+            data = data[os.write(out_fd, data) :]
+        return len(s)
+
     def _writeb(self, b: Any, flush: bool = True) -> int:
         # 'b' is defined as 'Any'. I wanted 'str | bytes' but my linter complains that
-        # those are incompatible with ReadableBuffer, which is what fileobj.write()
+        # those are incompatible with ReadableBuffer, which is what os.write()
         # apparently wants. And that doesn't seem to be a standard type.
-        n = self.fileobj.write(b)
-        if flush:
-            self.fileobj.flush()
-        return n
+        if flush and (not self._wbuf or hasattr(os, "writev")):
+            # Send b as it is instead of copying it into the buffer first:
+            # on its own, or together with what is held back in one writev().
+            data = memoryview(b).cast("B")
+            buf = self._wbuf
+            if buf:
+                n = os.writev(self.fd, [buf, data])
+                if n < len(buf):
+                    del buf[:n]
+                    self.flush()
+                    n = 0
+                else:
+                    n -= len(buf)
+                    buf.clear()
+                data = data[n:]
+            while data:
+                # os.write() may not write everything in one go.
+                data = data[os.write(self.fd, data) :]
+            return len(b)
+
+        self._wbuf += b
+        if flush or len(self._wbuf) >= self._wbuf_limit:
+            self.flush()
+        return len(b)
 
     def write(self, s: str | bytes, flush=True) -> int:
         """Write bytes to the pseudoterminal.
 
-        Returns the number of bytes written.
+        Returns the number of bytes written. If ``flush`` is False, the data
+        may be held back and sent together with later writes, until one of
+        them is flushed, :meth:`flush` is called, or enough data has built up.
         """
         return self._writeb(s, flush=flush)
 
@@ -532,30 +932,12 @@ class PtyProcess:
 
         See also, :meth:`sendintr` and :meth:`sendeof`.
         """
-        char = char.lower()
         a = ord(char)
-        if 97 <= a <= 122:
-            a = a - ord("a") + 1
-            byte = _byte(a)
-            return self._writeb(byte), byte
-        d = {
-            "@": 0,
-            "`": 0,
-            "[": 27,
-            "{": 27,
-            "\\": 28,
-            "|": 28,
-            "]": 29,
-            "}": 29,
-            "^": 30,
-            "~": 30,
-            "_": 31,
-            "?": 127,
-        }
-        if char not in d:
+        a = _CTRL_TABLE[a] if a < 128 else 0xFF
+        if a == 0xFF:
             return 0, b""
 
-        byte = _byte(d[char])
+        byte = _BYTES[a]
         return self._writeb(byte), byte
 
     def sendeof(self) -> tuple[int, bytes | None]:
@@ -600,22 +982,23 @@ class PtyProcess:
 
         if not self.isalive():
             return True
+        pidfd = _pidfd_open(self.pid)
         try:
             self.kill(signal.SIGHUP)
-            time.sleep(self.delayafterterminate)
+            self._wait_exit(pidfd, self.delayafterterminate)
             if not self.isalive():
                 return True
             self.kill(signal.SIGCONT)
-            time.sleep(self.delayafterterminate)
+            self._wait_exit(pidfd, self.delayafterterminate)
             if not self.isalive():
                 return True
             self.kill(signal.SIGINT)
-            time.sleep(self.delayafterterminate)
+            self._wait_exit(pidfd, self.delayafterterminate)
             if not self.isalive():
                 return True
             if force:
                 self.kill(signal.SIGKILL)
-                time.sleep(self.delayafterterminate)
+                self._wait_exit(pidfd, self.delayafterterminate)
                 if not self.isalive():
                     return True
                 else:
@@ -626,11 +1009,28 @@ class PtyProcess:
             # this to happen. I think isalive() reports True, but the
             # process is dead to the kernel.
             # Make one last attempt to see if the kernel is up to date.
-            time.sleep(self.delayafterterminate)
+            self._wait_exit(pidfd, self.delayafterterminate)
             if not self.isalive():
                 return True
             else:
                 return False
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def _wait_exit(self, pidfd: int | None, timeout: float) -> None:
+        # Sleep for up to timeout seconds, waking up as soon as the child
+        # exits if we have a pidfd for it. A negative timeout, which poll()
+        # would take as "wait forever", doesn't wait at all.
+        timeout = max(timeout, 0)
+        if pidfd is None:
+            time.sleep(timeout)
+        else:
+            # poll() rather than select(), which cannot handle fds >= 1024.
+            # Wherever there is pidfd_open() there is also poll().
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            poller.poll(timeout * 1000)
 
     def wait(self) -> int | None:
         """This waits until the child exits. This is a blocking call. This will
@@ -673,6 +1073,17 @@ class PtyProcess:
         if self.terminated:
             return False
 
+        # This is called a lot while the child is running (kill(), close(),
+        # polling loops in user code), so look up what that path needs once.
+        waitpid = os.waitpid
+        now = time.monotonic()
+        if (
+            self._isalive_cache_val is not None
+            and not self.flag_eof
+            and now - self._isalive_cache_time < _ISALIVE_CACHE_TTL
+        ):
+            return self._isalive_cache_val
+
         if self.flag_eof:
             # This is for Linux, which requires the blocking form
             # of waitpid to get the status of a defunct process.
@@ -683,7 +1094,7 @@ class PtyProcess:
             waitpid_options = os.WNOHANG
 
         try:
-            pid, status = os.waitpid(self.pid, waitpid_options)
+            pid, status = waitpid(self.pid, waitpid_options)
         except OSError as e:
             # No child processes
             if e.errno == errno.ECHILD:
@@ -703,7 +1114,7 @@ class PtyProcess:
         if pid == 0:
             try:
                 ### os.WNOHANG) # Solaris!
-                pid, status = os.waitpid(self.pid, waitpid_options)
+                pid, status = waitpid(self.pid, waitpid_options)
             except OSError as e:  # pragma: no cover
                 # This should never happen...
                 if e.errno == errno.ECHILD:
@@ -722,9 +1133,13 @@ class PtyProcess:
             # so I let read_nonblocking take care of this situation
             # (unfortunately, this requires waiting through the timeout).
             if pid == 0:
+                self._isalive_cache_val = True
+                self._isalive_cache_time = now
                 return True
 
         if pid == 0:
+            self._isalive_cache_val = True
+            self._isalive_cache_time = now
             return True
 
         if os.WIFEXITED(status):
@@ -757,13 +1172,16 @@ class PtyProcess:
         # Same as os.kill, but the pid is given for you.
         if self.isalive():
             os.kill(self.pid, sig)
+            # The signal may well change the answer.
+            self._isalive_cache_val = None
 
     def getwinsize(self) -> tuple[int, int]:
         """Return the window size of the pseudoterminal as a tuple (rows, cols)."""
         TIOCGWINSZ = getattr(termios, "TIOCGWINSZ", 1074295912)
-        s = struct.pack("HHHH", 0, 0, 0, 0)
-        x = fcntl.ioctl(self.fd, TIOCGWINSZ, s)
-        return struct.unpack("HHHH", x)[0:2]
+        buf = bytearray(_WINSZ.size)
+        fcntl.ioctl(self.fd, TIOCGWINSZ, buf, True)
+        rows, cols, _, _ = _WINSZ.unpack_from(buf)
+        return rows, cols
 
     def setwinsize(self, rows: int, cols: int) -> None:
         """Set the terminal window size of the child tty.
@@ -776,11 +1194,19 @@ class PtyProcess:
         return _setwinsize(self.fd, rows, cols)
 
 
+@functools.lru_cache(maxsize=32)
+def _get_inc_decoder_factory(encoding: str) -> Callable:
+    return codecs.getincrementaldecoder(encoding)
+
+
 class PtyProcessUnicode(PtyProcess):
     """Unicode wrapper around a process running in a pseudoterminal.
 
     This class exposes a similar interface to :class:`PtyProcess`, but its read
     methods return unicode, and its :meth:`write` accepts unicode.
+
+    Setting the ``raw`` attribute to True makes the read methods return bytes
+    without decoding them. :meth:`write` accepts bytes either way.
     """
 
     def __init__(
@@ -790,13 +1216,60 @@ class PtyProcessUnicode(PtyProcess):
         argv: list | None = None,
         env: Mapping | None = None,
         cwd: str | None = None,
+        raw: bool = False,
     ):
         super().__init__(pid, fd, argv, env, cwd)
+        self.raw = raw
         self.encoding = "utf-8"
         self.codec_errors = "strict"
-        self.decoder = codecs.getincrementaldecoder(self.encoding)(
-            errors=self.codec_errors
-        )
+        decoder = _get_inc_decoder_factory(self.encoding)(errors=self.codec_errors)
+        # While self.decoder is this UTF-8 decoder, chunks are decoded by
+        # calling the codec function directly, keeping any incomplete
+        # character at the end of a chunk for the next one.
+        if codecs.lookup(self.encoding).name == "utf-8":
+            self._utf8_decoder = decoder
+        else:
+            self._utf8_decoder = None
+        self._utf8_tail = b""
+        self.decoder = decoder
+
+    # encoding and decoder may be replaced after __init__, so the functions
+    # bound from them are kept in step by these properties.
+
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
+    @encoding.setter
+    def encoding(self, encoding: str) -> None:
+        self._encoding = encoding
+        # Bound once here rather than looked up on every write.
+        self._encode = codecs.getencoder(encoding)
+
+    @property
+    def decoder(self) -> codecs.IncrementalDecoder:
+        return self._decoder
+
+    @decoder.setter
+    def decoder(self, decoder: codecs.IncrementalDecoder) -> None:
+        self._decoder = decoder
+        # Bound once here rather than looked up on every read.
+        self._decode = decoder.decode
+        self._fast_utf8 = decoder is self._utf8_decoder
+
+    def _decode_chunk(self, b: bytes) -> str:
+        if self._fast_utf8:
+            errors = self._decoder.errors
+            # b can be empty, e.g. from read(0).
+            if not self._utf8_tail and (not b or b[-1] < 0x80):
+                # Ends with an ASCII byte, so there is no partial character
+                # to keep back for the next chunk.
+                return b.decode("utf-8", errors)
+            data = self._utf8_tail + b if self._utf8_tail else b
+            text, consumed = codecs.utf_8_decode(data, errors, False)
+            self._utf8_tail = data[consumed:]
+            return text
+        return self._decode(b, False)
 
     def read(self, size: int = 1024) -> str | bytes:
         """Read at most ``size`` bytes from the pty, return them as unicode.
@@ -806,9 +1279,10 @@ class PtyProcessUnicode(PtyProcess):
 
         The size argument still refers to bytes, not unicode code points.
         """
-        b = super(PtyProcessUnicode, self).read(size)
-        assert isinstance(b, bytes)
-        return self.decoder.decode(b, final=False)
+        b = super().read(size)
+        if self.raw:
+            return b
+        return self._decode_chunk(b)
 
     def readline(self) -> str | bytes:
         """Read one line from the pseudoterminal, and return it as unicode.
@@ -816,15 +1290,23 @@ class PtyProcessUnicode(PtyProcess):
         Can block if there is nothing to read. Raises :exc:`EOFError` if the
         terminal was closed.
         """
-        b = super(PtyProcessUnicode, self).readline()
-        assert isinstance(b, bytes)
-        return self.decoder.decode(b, final=False)
+        b = super().readline()
+        if self.raw:
+            return b
+        return self._decode_chunk(b)
 
     def write(self, s: str | bytes, flush: bool = True) -> int:
         """Write the unicode string ``s`` to the pseudoterminal.
 
-        Returns the number of bytes written.
+        Returns the number of bytes written. See :meth:`PtyProcess.write` for
+        the meaning of ``flush``. Bytes are written as they are.
         """
-        assert isinstance(s, str)
-        b = s.encode(self.encoding)
-        return super(PtyProcessUnicode, self).write(b, flush)
+        if isinstance(s, (bytes, bytearray)):
+            return super().write(s, flush)
+        if self._encode is codecs.utf_8_encode and s.isascii():
+            # ASCII text is its own UTF-8 encoding, and str knows whether it
+            # is ASCII without looking at the characters.
+            b = s.encode("ascii")
+        else:
+            b = self._encode(s)[0]
+        return super().write(b, flush)
@@ -35,3 +35,13 @@ class PtyEchoTestCase(unittest.TestCase):
         cat.sendeof()
         self._read_until_eof(cat)
         assert cat.wait() == 0
+
+    @unittest.skipIf(_is_solaris, "getecho cannot be called on this platform.")
+    def test_noecho_repeated_spawn(self):
+        """Echo stays off for later spawns, which reuse the first's attributes."""
+        for _ in range(2):
+            cat = PtyProcess.spawn(["cat"], echo=False)
+            assert cat.getecho() == False
+            cat.sendeof()
+            self._read_until_eof(cat)
+            assert cat.wait() == 0
@@ -33,6 +33,13 @@ class InvalidBinaryChars(unittest.TestCase):
     def test_invalid_binary(self):
         """This tests that we correctly handle the case where we attempt to
         spawn a child process but the exec call fails"""
+        self._check_invalid_binary()
+
+    def test_invalid_binary_preexec(self):
+        """As above, but taking the fork() path that preexec_fn requires."""
+        self._check_invalid_binary(preexec_fn=lambda: None)
+
+    def _check_invalid_binary(self, **kwargs):
 
         # Create a file that should fail the exec call
         dirpath = tempfile.mkdtemp()
@@ -54,7 +61,7 @@ class InvalidBinaryChars(unittest.TestCase):
 
         # TODO Verify this does what is intended on Windows
         try:
-            child = PtyProcess.spawn([fullpath])
+            child = PtyProcess.spawn([fullpath], **kwargs)
             # If we get here then an OSError was not raised
             child.close()
             raise AssertionError("OSError was not raised")
@@ -1,11 +1,16 @@
+import codecs
 import fcntl
 import os
+import resource
 import select
 import shutil
+import signal
 import tempfile
 import time
 import unittest
+from unittest import mock
 
+import ptyprocess.ptyprocess
 from ptyprocess import PtyProcess, PtyProcessUnicode
 
 
@@ -149,3 +154,285 @@ class PtyTestCase(unittest.TestCase):
 
             with open(temp_file_name, "r") as temp_file_r:
                 assert temp_file_r.read() == "hello"
+
+    def test_sendintr_controlling_tty(self):
+        """The pty is the child's controlling terminal, so ^C reaches it."""
+        p = PtyProcess.spawn(["cat"])
+        # wait for cat to start reading before sending the interrupt
+        time.sleep(0.2)
+        p.sendintr()
+        p.wait()
+        assert p.signalstatus == signal.SIGINT
+
+    def test_spawn_cwd(self):
+        td = tempfile.mkdtemp()
+        try:
+            p = PtyProcess.spawn(["pwd"], cwd=td)
+            outp = b""
+            while True:
+                try:
+                    outp += p.read()
+                except EOFError:
+                    break
+            assert os.path.realpath(td).encode() in outp
+            assert p.wait() == 0
+        finally:
+            shutil.rmtree(td)
+
+    def test_readline(self):
+        p = PtyProcess.spawn(["printf", r"one\ntwo\nthree"])
+        assert p.readline() == b"one\r\n"
+        assert p.read(2) == b"tw"
+        assert p.readline() == b"o\r\n"
+        assert p.readline() == b"three"
+        with self.assertRaises(EOFError):
+            p.readline()
+        assert p.wait() == 0
+
+    def test_winsize(self):
+        p = PtyProcess.spawn(["cat"], dimensions=(33, 99))
+        assert p.getwinsize() == (33, 99)
+        p.setwinsize(10, 20)
+        assert p.getwinsize() == (10, 20)
+        p.terminate(force=True)
+
+    def test_terminate(self):
+        p = PtyProcess.spawn(["cat"])
+        assert p.terminate()
+        assert not p.isalive()
+        assert p.signalstatus == signal.SIGHUP
+
+    def test_sendcontrol(self):
+        p = PtyProcess.spawn(["cat"])
+        assert p.sendcontrol("g") == (1, b"\x07")
+        assert p.sendcontrol("G") == (1, b"\x07")
+        assert p.sendcontrol("@") == (1, b"\x00")
+        assert p.sendcontrol("\\") == (1, b"\x1c")
+        assert p.sendcontrol("?") == (1, b"\x7f")
+        assert p.sendcontrol("1") == (0, b"")
+        assert p.sendcontrol("\xe9") == (0, b"")
+        p.terminate(force=True)
+
+    def _splice_all(self, p, out_fd):
+        while True:
+            try:
+                p.splice_to(out_fd)
+            except EOFError:
+                return
+
+    def test_splice_to_pipe(self):
+        r, w = os.pipe()
+        try:
+            p = PtyProcess.spawn(["echo", "hello"])
+            self._splice_all(p, w)
+            assert os.read(r, 100) == b"hello\r\n"
+            assert p.wait() == 0
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_splice_to_file(self):
+        for ptyp in PtyProcess, PtyProcessUnicode:
+            with tempfile.TemporaryFile() as f:
+                p = ptyp.spawn(["echo", "hello"])
+                self._splice_all(p, f.fileno())
+                f.seek(0)
+                assert f.read() == b"hello\r\n"
+                assert p.wait() == 0
+
+    def test_splice_to_after_readline(self):
+        """Data read ahead by readline() is passed on first."""
+        with tempfile.TemporaryFile() as f:
+            p = PtyProcessUnicode.spawn(["printf", r"one\ntwo\n"])
+            # let both lines arrive, so that readline() reads them together
+            time.sleep(0.2)
+            assert p.readline() == "one\r\n"
+            self._splice_all(p, f.fileno())
+            f.seek(0)
+            assert f.read() == b"two\r\n"
+            assert p.wait() == 0
+
+    def test_read_nonblocking(self):
+        p = PtyProcessUnicode.spawn(["cat"], echo=False)
+        with self.assertRaises(TimeoutError):
+            p.read_nonblocking(timeout=0.1)
+        p.write("hello\n")
+        assert p.read_nonblocking(timeout=5) == "hello\r\n"
+        p.sendeof()
+        with self.assertRaises(EOFError):
+            while True:
+                p.read_nonblocking(timeout=5)
+        assert p.wait() == 0
+
+    def test_write_without_flush(self):
+        p = PtyProcessUnicode.spawn(["cat"], echo=False)
+        assert p.write("hel", flush=False) == 3
+        assert p.write("lo\n", flush=False) == 3
+        # nothing has been sent yet, so cat has nothing to echo back
+        with self.assertRaises(TimeoutError):
+            p.read_nonblocking(timeout=0.1)
+        p.flush()
+        assert p.read_nonblocking(timeout=5) == "hello\r\n"
+        p.write("bye\n", flush=False)
+        p.sendeof()  # flushes what was written before it
+        outp = ""
+        while True:
+            try:
+                outp += p.read()
+            except EOFError:
+                break
+        assert outp == "bye\r\n"
+        assert p.wait() == 0
+
+    def test_read_unicode_split_character(self):
+        """A character split across two reads is decoded once it is complete."""
+        p = PtyProcessUnicode.spawn(["printf", r"\303\251t\303\251"])
+        outp = [p.read(1), p.read(2), p.read(1)]
+        assert outp == ["", "\xe9t", ""]
+        assert p.read() == "\xe9"
+        assert p.wait() == 0
+
+    def test_write_unicode_non_ascii(self):
+        p = PtyProcessUnicode.spawn(["cat"], echo=False)
+        assert p.write("\xe9t\xe9\n") == 6
+        assert p.readline() == "\xe9t\xe9\r\n"
+        p.sendeof()
+        assert p.wait() == 0
+
+    def test_readline_long_line(self):
+        """A line longer than one read is put together from several reads."""
+        line = "x" * 20000
+        p = PtyProcess.spawn(["printf", line + r"\nend\n"])
+        assert p.readline() == line.encode("ascii") + b"\r\n"
+        assert p.readline() == b"end\r\n"
+        assert p.wait() == 0
+
+    def test_unicode_raw(self):
+        p = PtyProcessUnicode.spawn(["cat"], echo=False)
+        p.raw = True
+        assert p.write(b"\xe9t\xe9\n") == 4
+        assert p.readline() == b"\xe9t\xe9\r\n"
+        p.raw = False
+        p.write("\xe9t\xe9\n")
+        assert p.readline() == "\xe9t\xe9\r\n"
+        p.sendeof()
+        assert p.wait() == 0
+
+    def _open_many_fds(self, count=1100):
+        """Open ``count`` fds, so that new fds are numbered 1024 and up."""
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard != resource.RLIM_INFINITY and hard < count + 64:
+            self.skipTest("RLIMIT_NOFILE is too low to open %d fds" % count)
+        if soft != resource.RLIM_INFINITY and soft < count + 64:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (count + 64, hard))
+            self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft, hard))
+        fds = [os.open(os.devnull, os.O_RDONLY) for _ in range(count)]
+        self.addCleanup(lambda: [os.close(fd) for fd in fds])
+
+    def test_close_with_high_fds(self):
+        """terminate() copes with a pidfd numbered 1024 or higher."""
+        self._open_many_fds()
+        p = PtyProcess.spawn(["sh", "-c", "trap '' HUP; sleep 10"])
+        assert p.fd >= 1024
+        # wait for the trap to be set up before close() sends SIGHUP
+        time.sleep(0.2)
+        p.close()
+        assert p.closed
+        assert p.fd == -1
+        assert not p.isalive()
+
+    def test_read_unicode_zero_bytes(self):
+        p = PtyProcessUnicode.spawn(["printf", r"one\ntwo\n"])
+        time.sleep(0.2)
+        assert p.readline() == "one\r\n"
+        assert p.read(0) == ""
+        assert p.readline() == "two\r\n"
+        assert p.wait() == 0
+
+    def test_read_nonblocking_high_fd(self):
+        self._open_many_fds()
+        p = PtyProcess.spawn(["cat"], echo=False)
+        assert p.fd >= 1024
+        with self.assertRaises(TimeoutError):
+            p.read_nonblocking(timeout=0.1)
+        p.write(b"hello\n")
+        assert p.read_nonblocking(timeout=5) == b"hello\r\n"
+        p.sendeof()
+        assert p.wait() == 0
+
+    def test_negative_timeouts(self):
+        """A negative timeout doesn't wait, rather than waiting forever."""
+        p = PtyProcess.spawn(["sleep", "5"])
+        start = time.time()
+        with self.assertRaises(TimeoutError):
+            p.read_nonblocking(timeout=-0.5)
+        p.delayafterterminate = -0.5
+        # without the delay the child may not have gone yet, so don't check
+        # the result, only that it didn't hang
+        p.terminate(force=True)
+        assert time.time() - start < 2
+        p.wait()
+
+    def test_spawn_without_posix_spawn_setsid(self):
+        """spawn() falls back to fork() where posix_spawn() lacks setsid."""
+
+        def posix_spawn(*args, **kwargs):
+            raise NotImplementedError("setsid is not supported")
+
+        with mock.patch.object(ptyprocess.ptyprocess, "_use_posix_spawn", True):
+            with mock.patch("os.posix_spawn", posix_spawn, create=True):
+                p = PtyProcess.spawn(["echo", "hello"])
+                assert not ptyprocess.ptyprocess._use_posix_spawn
+        assert p.readline() == b"hello\r\n"
+        assert p.wait() == 0
+
+    def test_close_fds_without_fd_listing(self):
+        """fds are still closed in the child where they cannot be listed."""
+        r, w = os.pipe()
+        try:
+            os.set_inheritable(w, True)
+            with mock.patch.object(ptyprocess.ptyprocess, "_open_fds", lambda: None):
+                # preexec_fn forces the fork() path, which uses _close_fds()
+                p = PtyProcess.spawn(
+                    ["bash", "-c", "printf bye >&{}".format(w)],
+                    preexec_fn=lambda: None,
+                )
+            p.read()  # Read error off child to allow it to terminate nicely
+            p.wait()
+            assert p.status != 0
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_posix_spawn_close_fds_without_fd_listing(self):
+        """Without preexec_fn, fds are closed where they cannot be listed."""
+        r, w = os.pipe()
+        try:
+            os.set_inheritable(w, True)
+            with mock.patch.object(ptyprocess.ptyprocess, "_open_fds", lambda: None):
+                p = PtyProcess.spawn(["bash", "-c", "printf leaked >&{}".format(w)])
+            p.read()  # Read error off child to allow it to terminate nicely
+            p.wait()
+            assert p.status != 0
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_close_unflushed_after_fd_closed(self):
+        """close() still terminates the child if held back data can't go."""
+        p = PtyProcess.spawn(["sleep", "5"])
+        p.write(b"x", flush=False)
+        os.close(p.fd)
+        p.close()
+        assert p.closed
+        assert not p.isalive()
+
+    def test_unicode_replace_encoding_and_decoder(self):
+        """Setting encoding or decoder after spawning takes effect."""
+        p = PtyProcessUnicode.spawn(["cat"], echo=False)
+        p.encoding = "latin-1"
+        p.decoder = codecs.getincrementaldecoder("latin-1")()
+        assert p.write("\xe9\n") == 2
+        assert p.readline() == "\xe9\r\n"
+        p.sendeof()
+        assert p.wait() == 0